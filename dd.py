@@ -1,15 +1,32 @@
 import pandas as pd
 import numpy as np
-import json # To handle potential JSON strings in 'attendees' column
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+import orjson # To handle potential JSON strings in 'attendees' column
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.json as pa_json
 
 # --- Configuration ---
 RAW_DATA_FILE = 'raw_data.xlsx - Sheet1.csv'
 OUTPUT_EXCEL_FILE = 'star_schema_output.xlsx'
+OUTPUT_PARQUET_DIR = 'star_schema_parquet' # One zstd-compressed Parquet file per table
+OUTPUT_CSV_SUFFIX = '.csv.gz' # The large fact/bridge tables are written as <table>.csv.gz instead of Excel sheets
 
 # --- 1. Load Raw Data ---
 print(f"Loading raw data from '{RAW_DATA_FILE}'...")
 try:
-    raw_df = pd.read_csv(RAW_DATA_FILE)
+    # PyArrow's multi-threaded C++ reader; ISO 8601 timestamps are parsed while reading, so the
+    # pd.to_datetime pass below only has to deal with columns Arrow couldn't parse
+    raw_table = pa_csv.read_csv(
+        RAW_DATA_FILE,
+        # Quoted cells may span lines (e.g. pretty-printed JSON in 'attendees'), as pd.read_csv allows
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(timestamp_parsers=[pa_csv.ISO8601], strings_can_be_null=True)
+    )
+    raw_df = raw_table.to_pandas()
     print("Raw data loaded successfully. Shape:", raw_df.shape)
     print("\nRaw data columns:")
     print(raw_df.columns.tolist())
@@ -28,6 +45,9 @@ raw_df.columns = raw_df.columns.str.lower().str.strip().str.replace(' ', '_')
 if 'event_id' in raw_df.columns:
     raw_df.rename(columns={'event_id': 'comm_id'}, inplace=True)
 
+# The set of available columns is fixed from here on; compute it once for the column checks below
+raw_columns = frozenset(raw_df.columns)
+
 # Ensure 'comm_id' is unique for the fact table (if not, we need to handle duplicates)
 if not raw_df['comm_id'].is_unique:
     print("\nWarning: 'comm_id' in raw data is not unique. This might indicate duplicate events or nested data.")
@@ -37,79 +57,234 @@ if not raw_df['comm_id'].is_unique:
 # Convert datetime columns if they exist and are strings
 datetime_cols = ['created_at', 'updated_at', 'start_time', 'end_time']
 for col in datetime_cols:
-    if col in raw_df.columns:
+    if col in raw_columns:
         # Using errors='coerce' will turn unparseable dates into NaT (Not a Time)
         raw_df[col] = pd.to_datetime(raw_df[col], errors='coerce')
         # Fill NaT if necessary, e.g., with a default datetime or by dropping rows
         raw_df[col] = raw_df[col].fillna(pd.NaT) # Keep NaT for now, handle later if needed
 
+# Highly repetitive columns become categoricals: an integer code per row plus the distinct values,
+# which is exactly the surrogate-key layout the dimension tables below need.
+# The long url columns are dictionary-encoded with PyArrow in their dimension builders instead.
+categorical_cols = ['event_type', 'event_title']
+for col in categorical_cols:
+    if col in raw_columns:
+        raw_df[col] = raw_df[col].astype('category')
+
 print("\nRaw data after initial cleaning and column renaming (head):")
 print(raw_df.head())
 
 
 # --- 3. Create Dimension Tables ---
 
-# --- dim_comm_type ---
-print("\nCreating dim_comm_type...")
-if 'event_type' in raw_df.columns:
-    dim_comm_type = raw_df[['event_type']].drop_duplicates().reset_index(drop=True)
-    dim_comm_type['comm_type_id'] = range(1, len(dim_comm_type) + 1) # Surrogate key
-    dim_comm_type.rename(columns={'event_type': 'comm_type'}, inplace=True)
-    # Create a mapping for fact table
-    comm_type_mapping = dim_comm_type.set_index('comm_type')['comm_type_id'].to_dict()
-else:
-    print("Warning: 'event_type' column not found for dim_comm_type. Creating dummy dim_comm_type.")
-    dim_comm_type = pd.DataFrame({
-        'comm_type_id': [1, 2],
-        'comm_type': ['Meeting', 'Call']
-    })
-    comm_type_mapping = dim_comm_type.set_index('comm_type')['comm_type_id'].to_dict()
+# Each builder returns (dimension table, per-row codes into it, -1 where the row has no value).
+# They only read raw_df, so they can run side by side; pandas/numpy release the GIL in their C loops.
+
+# Helper function to number the distinct values of a string column with PyArrow's dictionary_encode,
+# whose string hash table is cheaper than hashing full urls in pandas. Returns (codes, uniques), nulls get -1.
+def dictionary_encode_column(col):
+    # Encode as strings: an all-empty column would otherwise become a NullArray whose dictionary is [None].
+    # Large pandas string columns can come back chunked, so combine them into one array first.
+    url_arr = pa.array(raw_df[col].astype('string'), from_pandas=True, type=pa.string())
+    if isinstance(url_arr, pa.ChunkedArray):
+        url_arr = url_arr.combine_chunks()
+    dict_arr = url_arr.dictionary_encode()
+    codes = pc.fill_null(dict_arr.indices, -1).to_numpy()
+    return codes, dict_arr.dictionary.to_pandas()
 
-print("dim_comm_type:\n", dim_comm_type.head())
+# --- dim_comm_type ---
+def build_dim_comm_type():
+    if 'event_type' in raw_columns:
+        # The categorical codes already number the rows against the distinct values (-1 for missing)
+        comm_type_codes = raw_df['event_type'].cat.codes.to_numpy()
+        comm_type_uniques = raw_df['event_type'].cat.categories
+        dim_comm_type = pd.DataFrame({
+            'comm_type': comm_type_uniques,
+            'comm_type_id': np.arange(1, len(comm_type_uniques) + 1) # Surrogate key
+        })
+    else:
+        print("Warning: 'event_type' column not found for dim_comm_type. Creating dummy dim_comm_type.")
+        dim_comm_type = pd.DataFrame({
+            'comm_type_id': [1, 2],
+            'comm_type': ['Meeting', 'Call']
+        })
+        comm_type_codes = np.full(len(raw_df), -1) # No match, fact rows get comm_type_id 0
+    return dim_comm_type, comm_type_codes
 
 
 # --- dim_subject ---
-print("\nCreating dim_subject...")
-if 'event_title' in raw_df.columns:
-    dim_subject = raw_df[['event_title']].drop_duplicates().reset_index(drop=True)
-    dim_subject['subject_id'] = range(1, len(dim_subject) + 1) # Surrogate key
-    dim_subject.rename(columns={'event_title': 'subject'}, inplace=True)
-    # Create a mapping for fact table
-    subject_mapping = dim_subject.set_index('subject')['subject_id'].to_dict()
-else:
-    print("Warning: 'event_title' column not found for dim_subject. Creating dummy dim_subject.")
-    dim_subject = pd.DataFrame({
-        'subject_id': [1, 2],
-        'subject': ['Project Review', 'Team Sync']
-    })
-    subject_mapping = dim_subject.set_index('subject')['subject_id'].to_dict()
+def build_dim_subject():
+    if 'event_title' in raw_columns:
+        subject_codes = raw_df['event_title'].cat.codes.to_numpy()
+        subject_uniques = raw_df['event_title'].cat.categories
+        dim_subject = pd.DataFrame({
+            'subject': subject_uniques,
+            'subject_id': np.arange(1, len(subject_uniques) + 1) # Surrogate key
+        })
+    else:
+        print("Warning: 'event_title' column not found for dim_subject. Creating dummy dim_subject.")
+        dim_subject = pd.DataFrame({
+            'subject_id': [1, 2],
+            'subject': ['Project Review', 'Team Sync']
+        })
+        subject_codes = np.full(len(raw_df), -1)
+    return dim_subject, subject_codes
+
+
+# --- dim_calendar ---
+def build_dim_calendar():
+    # Assuming 'start_time' is the primary date for calendar dimension
+    if 'start_time' in raw_columns:
+        # Work on whole days since the epoch (int64) instead of formatted date strings
+        start_dates = raw_df['start_time'].to_numpy(dtype='datetime64[D]')
+        has_start_date = ~np.isnat(start_dates)
+        calendar_codes = np.full(len(raw_df), -1)
+        calendar_codes[has_start_date], calendar_days = pd.factorize(start_dates[has_start_date].view('i8'))
+        # Date attributes are computed once per distinct day, not once per row
+        dim_calendar_dates = pd.to_datetime(calendar_days, unit='D')
+        dim_calendar = pd.DataFrame({
+            'calendar_date': dim_calendar_dates,
+            'year': dim_calendar_dates.year,
+            'month': dim_calendar_dates.month,
+            'day': dim_calendar_dates.day,
+            'day_of_week': dim_calendar_dates.dayofweek,
+            'day_name': dim_calendar_dates.day_name(),
+            'month_name': dim_calendar_dates.month_name()
+        })
+        dim_calendar['calendar_id'] = np.arange(1, len(dim_calendar) + 1) # Surrogate key
+    else:
+        print("Warning: 'start_time' column not found for dim_calendar. Creating dummy dim_calendar.")
+        dim_calendar = pd.DataFrame({
+            'calendar_id': [1, 2],
+            'calendar_date': pd.to_datetime(['2023-01-01', '2023-01-02']),
+            'year': [2023, 2023],
+            'month': [1, 1],
+            'day': [1, 2],
+            'day_of_week': [6, 0], # Sunday, Monday
+            'day_name': ['Sunday', 'Monday'],
+            'month_name': ['January', 'January']
+        })
+        calendar_codes = np.full(len(raw_df), -1)
+    return dim_calendar, calendar_codes
+
+
+# --- dim_audio ---
+def build_dim_audio():
+    if 'audio_url' in raw_columns:
+        audio_codes, audio_uniques = dictionary_encode_column('audio_url')
+        dim_audio = pd.DataFrame({
+            'audio_url': audio_uniques,
+            'audio_id': np.arange(1, len(audio_uniques) + 1) # Surrogate key
+        })
+    else:
+        print("Warning: 'audio_url' column not found for dim_audio. Creating dummy dim_audio.")
+        dim_audio = pd.DataFrame({
+            'audio_id': [1, 2],
+            'audio_url': ['http://dummy.com/audio1.mp3', 'http://dummy.com/audio2.mp3']
+        })
+        audio_codes = np.full(len(raw_df), -1)
+    return dim_audio, audio_codes
+
 
-print("dim_subject:\n", dim_subject.head())
+# --- dim_video ---
+def build_dim_video():
+    if 'video_url' in raw_columns:
+        video_codes, video_uniques = dictionary_encode_column('video_url')
+        dim_video = pd.DataFrame({
+            'video_url': video_uniques,
+            'video_id': np.arange(1, len(video_uniques) + 1) # Surrogate key
+        })
+    else:
+        print("Warning: 'video_url' column not found for dim_video. Creating dummy dim_video.")
+        dim_video = pd.DataFrame({
+            'video_id': [1, 2],
+            'video_url': ['http://dummy.com/video1.mp4', 'http://dummy.com/video2.mp4']
+        })
+        video_codes = np.full(len(raw_df), -1)
+    return dim_video, video_codes
+
+
+# --- dim_transcript ---
+def build_dim_transcript():
+    if 'transcript_url' in raw_columns:
+        transcript_codes, transcript_uniques = dictionary_encode_column('transcript_url')
+        dim_transcript = pd.DataFrame({
+            'transcript_url': transcript_uniques,
+            'transcript_id': np.arange(1, len(transcript_uniques) + 1) # Surrogate key
+        })
+    else:
+        print("Warning: 'transcript_url' column not found for dim_transcript. Creating dummy dim_transcript.")
+        dim_transcript = pd.DataFrame({
+            'transcript_id': [1, 2],
+            'transcript_url': ['http://dummy.com/trans1.txt', 'http://dummy.com/trans2.txt']
+        })
+        transcript_codes = np.full(len(raw_df), -1)
+    return dim_transcript, transcript_codes
+
+
+dimension_builders = {
+    'dim_comm_type': build_dim_comm_type,
+    'dim_subject': build_dim_subject,
+    'dim_calendar': build_dim_calendar,
+    'dim_audio': build_dim_audio,
+    'dim_video': build_dim_video,
+    'dim_transcript': build_dim_transcript
+}
+print("\nCreating " + ", ".join(dimension_builders) + "...")
+with ThreadPoolExecutor(max_workers=len(dimension_builders)) as executor:
+    dimension_futures = {name: executor.submit(builder) for name, builder in dimension_builders.items()}
+    dim_comm_type, comm_type_codes = dimension_futures['dim_comm_type'].result()
+    dim_subject, subject_codes = dimension_futures['dim_subject'].result()
+    dim_calendar, calendar_codes = dimension_futures['dim_calendar'].result()
+    dim_audio, audio_codes = dimension_futures['dim_audio'].result()
+    dim_video, video_codes = dimension_futures['dim_video'].result()
+    dim_transcript, transcript_codes = dimension_futures['dim_transcript'].result()
+
+for name, dim_df in [('dim_comm_type', dim_comm_type), ('dim_subject', dim_subject), ('dim_calendar', dim_calendar),
+                     ('dim_audio', dim_audio), ('dim_video', dim_video), ('dim_transcript', dim_transcript)]:
+    print(f"{name}:\n", dim_df.head())
 
 
 # --- dim_user & bridge_comm_user (most complex part due to nested users) ---
 print("\nCreating dim_user and bridge_comm_user...")
-all_users = []
-comm_user_relations = []
-user_id_counter = 1
-user_email_to_id = {} # To store unique users and their surrogate IDs
-
-# Helper function to process user data
-def process_user_data(comm_id, user_list_str, role_type):
-    if pd.isna(user_list_str) or user_list_str == '[]':
-        return []
+ROLE_BITS = {'attendees': 1, 'participants': 2, 'speakers': 4, 'organizer': 8}
+ROLE_ORDER = {8: 0, 1: 1, 2: 2, 4: 3} # role_bit -> position of the role within a communication (organizer first)
+USER_FIELDS = ['email', 'name', 'location', 'displayName', 'phoneNumber']
+USER_ENTRY_COLUMNS = ['row_pos', 'role_bit'] + USER_FIELDS
+# Arrow schema of one NDJSON line built from a user list cell; other keys in the user dicts are ignored
+USER_LIST_SCHEMA = pa.schema([
+    ('row_pos', pa.int64()),
+    ('role_bit', pa.int8()),
+    ('users', pa.list_(pa.struct([(field, pa.string()) for field in USER_FIELDS])))
+])
+ROLE_FLAG_COLUMNS = {1: 'isAttendee', 2: 'isParticipant', 4: 'isSpeaker', 8: 'isOrganiser'} # role_bit -> bridge column
+# Series versions of the role mappings for column-wise .map(): mapping with a Series is an index
+# lookup, while a dict is turned into a Series again on every call
+ROLE_BITS_SERIES = pd.Series(ROLE_BITS)
+ROLE_ORDER_SERIES = pd.Series(ROLE_ORDER)
+ROLE_FLAG_COLUMNS_SERIES = pd.Series(ROLE_FLAG_COLUMNS)
+
+# Helper function to turn a raw user list cell into a list of user entries
+def parse_user_list(user_list_str):
+    if not isinstance(user_list_str, str): # If it's already a list/dict object (not string)
+        return user_list_str if isinstance(user_list_str, list) else [user_list_str] # Ensure it's a list for iteration
     try:
         # The 'attendees' column might be a string representation of a list of dictionaries
-        users_raw = json.loads(user_list_str)
+        users_raw = orjson.loads(user_list_str)
         if not isinstance(users_raw, list): # Handle cases where it's a single dict or malformed
             users_raw = [users_raw]
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         # If it's not a valid JSON string (e.g., just an email or plain string)
         # Try to treat it as a single email string
         users_raw = [{'email': user_list_str, 'name': user_list_str}] # Make it a list of dicts
-    except TypeError: # If it's already a list/dict object (not string)
-        if not isinstance(user_list_str, list):
-            users_raw = [user_list_str] # Ensure it's a list for iteration
+    return users_raw
+
+# Helper function to process user data that couldn't go through the Arrow reader.
+# row_pos is the position of the communication in user_source_df.
+def process_user_data(row_pos, user_list_str, role_type):
+    if pd.isna(user_list_str) or user_list_str == '[]':
+        return []
+    users_raw = parse_user_list(user_list_str)
 
     processed_users = []
     for user_info in users_raw:
@@ -129,189 +304,189 @@ def process_user_data(comm_id, user_list_str, role_type):
         if not email or pd.isna(email):
             continue
 
-        if email not in user_email_to_id:
-            user_email_to_id[email] = user_id_counter
-            all_users.append({
-                'user_id': user_id_to_id[email],
-                'name': name,
-                'email': email,
-                'location': location,
-                'displayName': display_name,
-                'phoneNumber': phone_number
-            })
-            user_id_counter += 1
-        
-        user_id = user_email_to_id[email]
-
-        relation = {
-            'comm_id': comm_id,
-            'user_id': user_id,
-            'isAttendee': 0,
-            'isParticipant': 0,
-            'isSpeaker': 0,
-            'isOrganiser': 0
-        }
-        # Set the appropriate role flag
-        if role_type == 'attendees':
-            relation['isAttendee'] = 1
-        elif role_type == 'participants':
-            relation['isParticipant'] = 1
-        elif role_type == 'speakers':
-            relation['isSpeaker'] = 1
-        elif role_type == 'organizer': # This is a single organizer, not a list
-            relation['isOrganiser'] = 1
-        processed_users.append(relation)
+        # Each role is one bit, so several roles of the same user in a communication can be OR-ed together
+        processed_users.append((row_pos, ROLE_BITS[role_type], email, name, location, display_name, phone_number))
     return processed_users
 
-# Iterate through raw_df to populate users and relations
-for index, row in raw_df.iterrows():
-    comm_id = row['comm_id']
-
-    # Process organizer
-    if 'organizer_email' in row and pd.notna(row['organizer_email']):
-        # Create a dict that simulates the structure of an attendee for consistency
-        organizer_info = {
-            'email': row['organizer_email'],
-            'name': row.get('organizer_name', row['organizer_email']), # Use name if exists, else email
-            'location': row.get('organizer_location'), # Assuming such columns might exist
-            'displayName': row.get('organizer_display_name'),
-            'phoneNumber': row.get('organizer_phone_number')
-        }
-        relations = process_user_data(comm_id, json.dumps([organizer_info]), 'organizer')
-        comm_user_relations.extend(relations) # Extend with the list of relations
-
-    # Process attendees, participants, speakers
-    for col_name, role in [('attendees', 'attendees'), ('participants', 'participants'), ('speakers', 'speakers')]:
-        if col_name in row and pd.notna(row[col_name]):
-            relations = process_user_data(comm_id, row[col_name], role)
-            comm_user_relations.extend(relations)
-
-# Create dim_user DataFrame
-dim_user = pd.DataFrame(all_users).drop_duplicates(subset=['user_id']).reset_index(drop=True)
-# Ensure user_id is the primary key and sort for consistency
-dim_user = dim_user.sort_values('user_id').set_index('user_id').reset_index()
+# Gather every user occurrence as one row of a columnar user_entries_df table
+# Only the columns used below are pulled into a narrow frame. Missing columns come through as NaN.
+user_source_cols = [
+    'comm_id', 'organizer_email', 'organizer_name', 'organizer_location',
+    'organizer_display_name', 'organizer_phone_number', 'attendees', 'participants', 'speakers'
+]
+user_source_df = raw_df.reindex(columns=user_source_cols).reset_index(drop=True)
+
+# Helper function to turn an organizer_* column into strings like the user fields parsed from JSON.
+# The CSV reader may type e.g. a phone number column as numbers (float when it has gaps), so whole
+# numbers are written without a trailing '.0'.
+def as_string_column(col):
+    if pd.api.types.is_float_dtype(col) and (col.dropna() % 1 == 0).all():
+        col = col.astype('Int64')
+    return col.astype('string')
+
+# Organizers are already one column per field
+organizer_df = user_source_df[user_source_df['organizer_email'].notna()]
+organizer_entries_df = pd.DataFrame({
+    'row_pos': organizer_df.index.to_numpy(),
+    'role_bit': ROLE_BITS['organizer'],
+    'email': as_string_column(organizer_df['organizer_email']),
+    'name': as_string_column(organizer_df['organizer_name']),
+    'location': as_string_column(organizer_df['organizer_location']),
+    'displayName': as_string_column(organizer_df['organizer_display_name']),
+    'phoneNumber': as_string_column(organizer_df['organizer_phone_number'])
+})
+
+# Cells that look like JSON lists of user dicts are wrapped into one NDJSON document
+# ('{"row_pos":..,"role_bit":..,"users":[...]}' per cell) and parsed by PyArrow's C++ JSON reader
+# straight into columns. Anything else (plain emails, single dicts, ...) is parsed per cell below.
+arrow_cells = []
+fallback_cells = []
+for col_name in ['attendees', 'participants', 'speakers']:
+    if col_name not in raw_columns: # Nothing to parse, the column would be all NaN
+        continue
+    cells_df = pd.DataFrame({'row_pos': np.arange(len(user_source_df)), 'role': col_name, 'cell': user_source_df[col_name].to_numpy()})
+    is_user_list = user_source_df[col_name].astype('string').str.match(r'\s*\[\s*[{\]]', na=False).to_numpy()
+    arrow_cells.append(cells_df[is_user_list])
+    fallback_cells.append(cells_df[~is_user_list])
+arrow_cells = pd.concat(arrow_cells, ignore_index=True) if arrow_cells else pd.DataFrame(columns=['row_pos', 'role', 'cell'])
+fallback_cells = pd.concat(fallback_cells, ignore_index=True) if fallback_cells else pd.DataFrame(columns=['row_pos', 'role', 'cell'])
+
+# NDJSON needs one record per line. Cells with raw line breaks are compacted by parsing and re-dumping
+# them with orjson, which only accepts line breaks outside string literals; cells it rejects go to the
+# per-cell path, which treats them the same way it always did.
+has_line_break = arrow_cells['cell'].astype('string').str.contains('[\r\n]', regex=True, na=False).to_numpy()
+if has_line_break.any():
+    compacted_cells = []
+    for cell in arrow_cells.loc[has_line_break, 'cell']:
+        try:
+            compacted_cells.append(orjson.dumps(orjson.loads(cell)).decode('utf-8'))
+        except (orjson.JSONDecodeError, orjson.JSONEncodeError):
+            compacted_cells.append(None)
+    compacted_cells = pd.Series(compacted_cells, index=arrow_cells.index[has_line_break], dtype=object)
+    not_compacted = compacted_cells.index[compacted_cells.isna().to_numpy()]
+    fallback_cells = pd.concat([fallback_cells, arrow_cells.loc[not_compacted]], ignore_index=True)
+    arrow_cells.loc[compacted_cells.index, 'cell'] = compacted_cells
+    arrow_cells = arrow_cells.drop(index=not_compacted).reset_index(drop=True)
+
+# Helper function to read a batch of user list cells with PyArrow. If the batch is rejected it is split
+# in half and retried, so a few bad cells (mixed entries, numbers where strings are expected, ...) are
+# narrowed down and handed to the per-cell path on their own instead of taking the whole frame with them.
+# Returns (list of entry DataFrames, list of rejected cell DataFrames).
+def read_user_list_cells(cells_df):
+    cell_lines = (
+        '{"row_pos":' + cells_df['row_pos'].astype(str)
+        + ',"role_bit":' + cells_df['role'].map(ROLE_BITS_SERIES).astype(str)
+        + ',"users":' + cells_df['cell'].astype(str) + '}'
+    )
+    try:
+        user_lists_table = pa_json.read_json(
+            io.BytesIO('\n'.join(cell_lines).encode('utf-8')),
+            parse_options=pa_json.ParseOptions(explicit_schema=USER_LIST_SCHEMA, unexpected_field_behavior='ignore')
+        )
+        # A cell containing something like ']} {"row_pos":...' would split into extra records with made-up
+        # row_pos/role_bit values, so every cell must come back as exactly its own record
+        if (user_lists_table.num_rows != len(cells_df)
+                or not np.array_equal(user_lists_table.column('row_pos').to_numpy(), cells_df['row_pos'].to_numpy(dtype=np.int64))):
+            raise pa.ArrowInvalid("user list cells did not map one-to-one onto NDJSON records")
+    except pa.ArrowInvalid:
+        if len(cells_df) == 1:
+            return [], [cells_df]
+        half = len(cells_df) // 2
+        first_entries, first_rejected = read_user_list_cells(cells_df.iloc[:half])
+        second_entries, second_rejected = read_user_list_cells(cells_df.iloc[half:])
+        return first_entries + second_entries, first_rejected + second_rejected
+
+    user_lists = user_lists_table.column('users').combine_chunks()
+    users_flat = pc.list_flatten(user_lists)
+    user_parents = pc.list_parent_indices(user_lists)
+    entries_df = pd.DataFrame({
+        'row_pos': pc.take(user_lists_table.column('row_pos'), user_parents).to_numpy(),
+        'role_bit': pc.take(user_lists_table.column('role_bit'), user_parents).to_numpy(),
+        **{field: pc.struct_field(users_flat, field).to_pandas() for field in USER_FIELDS}
+    })
+    return [entries_df], []
+
+arrow_entries_df = pd.DataFrame(columns=USER_ENTRY_COLUMNS)
+if len(arrow_cells):
+    arrow_entries_dfs, rejected_cells = read_user_list_cells(arrow_cells)
+    if arrow_entries_dfs:
+        arrow_entries_df = pd.concat(arrow_entries_dfs, ignore_index=True)
+    if rejected_cells:
+        rejected_cells = pd.concat(rejected_cells, ignore_index=True)
+        print(f"Warning: {len(rejected_cells)} user list cell(s) could not be read in bulk, parsing them per cell.")
+        fallback_cells = pd.concat([fallback_cells, rejected_cells], ignore_index=True)
+
+fallback_entries = []
+for row_pos, role, user_list_str in fallback_cells.itertuples(index=False, name=None):
+    if pd.notna(user_list_str):
+        fallback_entries.extend(process_user_data(row_pos, user_list_str, role))
+fallback_entries_df = pd.DataFrame(fallback_entries, columns=USER_ENTRY_COLUMNS)
+# orjson keeps JSON numbers (e.g. a numeric phoneNumber) as numbers; the Arrow path reads every field as a string
+for field in USER_FIELDS:
+    fallback_entries_df[field] = as_string_column(fallback_entries_df[field])
+
+# Put the entries back in row order (organizer, attendees, participants, speakers) so user ids
+# keep being handed out in order of first appearance
+user_entries_dfs = [df for df in [organizer_entries_df, arrow_entries_df, fallback_entries_df] if len(df)]
+if user_entries_dfs:
+    user_entries_df = pd.concat(user_entries_dfs, ignore_index=True).reindex(columns=USER_ENTRY_COLUMNS)
+else:
+    user_entries_df = pd.DataFrame(columns=USER_ENTRY_COLUMNS)
+role_order = user_entries_df['role_bit'].map(ROLE_ORDER_SERIES).to_numpy(dtype=np.int64)
+entry_order = np.argsort(user_entries_df['row_pos'].to_numpy(dtype=np.int64) * 4 + role_order, kind='stable')
+user_entries_df = user_entries_df.iloc[entry_order].reset_index(drop=True)
+
+# Same fallbacks as process_user_data: name -> displayName -> email, displayName -> name, skip missing emails
+for field in ['email', 'name', 'displayName']:
+    user_entries_df[field] = user_entries_df[field].mask(user_entries_df[field] == '')
+user_entries_df = user_entries_df[user_entries_df['email'].notna()].reset_index(drop=True)
+user_entries_df['name'] = user_entries_df['name'].fillna(user_entries_df['displayName']).fillna(user_entries_df['email'])
+user_entries_df['displayName'] = user_entries_df['displayName'].fillna(user_entries_df['name'])
+
+# factorize numbers the distinct emails in order of first appearance: user_id = code + 1
+user_codes, _ = pd.factorize(user_entries_df['email'])
+entry_comm_ids = user_source_df['comm_id'].to_numpy()[user_entries_df['row_pos'].to_numpy(dtype=np.int64)]
+entry_role_bits = user_entries_df['role_bit'].to_numpy(dtype=np.int8)
+entry_user_ids = user_codes + 1
+
+# Create dim_user DataFrame, taking the first non-null value of each attribute per user
+dim_user = user_entries_df[['name', 'email', 'location', 'displayName', 'phoneNumber']].groupby(user_codes).first()
+# One string type per attribute column, the sources (organizer columns, Arrow, per-cell JSON) can mix
+# numbers and strings and Parquet needs a single type per column
+dim_user = dim_user.astype('string')
+dim_user.insert(0, 'user_id', dim_user.index + 1)
+dim_user = dim_user.reset_index(drop=True)
 
 print("dim_user:\n", dim_user.head())
 
 # Create bridge_comm_user DataFrame
-# Aggregate relations by (comm_id, user_id) to merge roles
-bridge_comm_user = pd.DataFrame(comm_user_relations)
-# Group by comm_id and user_id, then sum the boolean flags to combine roles
-bridge_comm_user = bridge_comm_user.groupby(['comm_id', 'user_id']).agg({
-    'isAttendee': 'max', # max will ensure 1 if any role is 1
-    'isParticipant': 'max',
-    'isSpeaker': 'max',
-    'isOrganiser': 'max'
-}).reset_index()
+# One (comm_id, user_id, role) row per occurrence, pivoted into one 0/1 column per role
+comm_user_roles = pd.DataFrame({
+    'comm_id': entry_comm_ids,
+    'user_id': entry_user_ids,
+    'role': pd.Categorical(pd.Series(entry_role_bits).map(ROLE_FLAG_COLUMNS_SERIES), categories=list(ROLE_FLAG_COLUMNS.values()))
+})
+bridge_comm_user = (
+    pd.crosstab([comm_user_roles['comm_id'], comm_user_roles['user_id']], comm_user_roles['role'])
+    .clip(upper=1) # A user listed twice in the same role still only gets a 1
+    .reindex(columns=list(ROLE_FLAG_COLUMNS.values()), fill_value=0) # Roles nobody has still get a column
+    .rename_axis(index=['comm_id', 'user_id'], columns=None)
+    .reset_index()
+)
 
 print("bridge_comm_user:\n", bridge_comm_user.head())
 
 
-# --- dim_calendar ---
-print("\nCreating dim_calendar...")
-# Assuming 'start_time' is the primary date for calendar dimension
-if 'start_time' in raw_df.columns:
-    dim_calendar_dates = raw_df['start_time'].dt.normalize().dropna().drop_duplicates().reset_index(drop=True)
-    dim_calendar = pd.DataFrame({
-        'calendar_date': dim_calendar_dates,
-        'year': dim_calendar_dates.dt.year,
-        'month': dim_calendar_dates.dt.month,
-        'day': dim_calendar_dates.dt.day,
-        'day_of_week': dim_calendar_dates.dt.dayofweek,
-        'day_name': dim_calendar_dates.dt.day_name(),
-        'month_name': dim_calendar_dates.dt.month_name()
-    })
-    dim_calendar['calendar_id'] = range(1, len(dim_calendar) + 1) # Surrogate key
-    # Create a mapping for fact table
-    # Mapping date string 'YYYY-MM-DD' to calendar_id
-    calendar_mapping = dim_calendar.set_index(dim_calendar['calendar_date'].dt.strftime('%Y-%m-%d'))['calendar_id'].to_dict()
-else:
-    print("Warning: 'start_time' column not found for dim_calendar. Creating dummy dim_calendar.")
-    dim_calendar = pd.DataFrame({
-        'calendar_id': [1, 2],
-        'calendar_date': pd.to_datetime(['2023-01-01', '2023-01-02']),
-        'year': [2023, 2023],
-        'month': [1, 1],
-        'day': [1, 2],
-        'day_of_week': [6, 0], # Sunday, Monday
-        'day_name': ['Sunday', 'Monday'],
-        'month_name': ['January', 'January']
-    })
-    calendar_mapping = dim_calendar.set_index(dim_calendar['calendar_date'].dt.strftime('%Y-%m-%d'))['calendar_id'].to_dict()
-
-print("dim_calendar:\n", dim_calendar.head())
-
-
-# --- dim_audio ---
-print("\nCreating dim_audio...")
-if 'audio_url' in raw_df.columns:
-    dim_audio = raw_df[['audio_url']].dropna().drop_duplicates().reset_index(drop=True)
-    dim_audio['audio_id'] = range(1, len(dim_audio) + 1) # Surrogate key
-    # Create a mapping for fact table
-    audio_mapping = dim_audio.set_index('audio_url')['audio_id'].to_dict()
-else:
-    print("Warning: 'audio_url' column not found for dim_audio. Creating dummy dim_audio.")
-    dim_audio = pd.DataFrame({
-        'audio_id': [1, 2],
-        'audio_url': ['http://dummy.com/audio1.mp3', 'http://dummy.com/audio2.mp3']
-    })
-    audio_mapping = dim_audio.set_index('audio_url')['audio_id'].to_dict()
-
-print("dim_audio:\n", dim_audio.head())
-
-
-# --- dim_video ---
-print("\nCreating dim_video...")
-if 'video_url' in raw_df.columns:
-    dim_video = raw_df[['video_url']].dropna().drop_duplicates().reset_index(drop=True)
-    dim_video['video_id'] = range(1, len(dim_video) + 1) # Surrogate key
-    # Create a mapping for fact table
-    video_mapping = dim_video.set_index('video_url')['video_id'].to_dict()
-else:
-    print("Warning: 'video_url' column not found for dim_video. Creating dummy dim_video.")
-    dim_video = pd.DataFrame({
-        'video_id': [1, 2],
-        'video_url': ['http://dummy.com/video1.mp4', 'http://dummy.com/video2.mp4']
-    })
-    video_mapping = dim_video.set_index('video_url')['video_id'].to_dict()
-
-print("dim_video:\n", dim_video.head())
-
-
-# --- dim_transcript ---
-print("\nCreating dim_transcript...")
-if 'transcript_url' in raw_df.columns:
-    dim_transcript = raw_df[['transcript_url']].dropna().drop_duplicates().reset_index(drop=True)
-    dim_transcript['transcript_id'] = range(1, len(dim_transcript) + 1) # Surrogate key
-    # Create a mapping for fact table
-    transcript_mapping = dim_transcript.set_index('transcript_url')['transcript_id'].to_dict()
-else:
-    print("Warning: 'transcript_url' column not found for dim_transcript. Creating dummy dim_transcript.")
-    dim_transcript = pd.DataFrame({
-        'transcript_id': [1, 2],
-        'transcript_url': ['http://dummy.com/trans1.txt', 'http://dummy.com/trans2.txt']
-    })
-    transcript_mapping = dim_transcript.set_index('transcript_url')['transcript_id'].to_dict()
-
-print("dim_transcript:\n", dim_transcript.head())
-
-
 # --- 4. Create Fact Table (`fact_communication`) ---
 print("\nCreating fact_communication...")
 
 fact_communication = raw_df[[
     'comm_id',
     'source_id', # Assuming source_id exists in raw_df as per dictionary
-    'event_type', # For mapping to comm_type_id
-    'event_title', # For mapping to subject_id
-    'start_time', # For mapping to calendar_id and datetime_id
-    'audio_url', # For mapping to audio_id
-    'video_url', # For mapping to video_id
-    'transcript_url', # For mapping to transcript_id
+    'event_title', # Kept as raw_title
     'created_at', # For ingested_at
     'updated_at', # For processed_at
     'is_processed', # For is_processed
-    'raw_title', # For raw_title (assuming 'event_title' is the raw title)
     'duration_seconds' # For raw_duration (assuming 'duration_seconds' is the raw duration)
 ]].copy()
 
@@ -324,33 +499,46 @@ fact_communication.rename(columns={
 }, inplace=True)
 
 # Map foreign keys
-# Using .get() for mappings to handle cases where a value might not be in the mapping dict
-fact_communication['comm_type_id'] = fact_communication['event_type'].map(comm_type_mapping).fillna(0).astype(int)
-fact_communication['subject_id'] = fact_communication['raw_title'].map(subject_mapping).fillna(0).astype(int)
-fact_communication['calendar_id'] = fact_communication['start_time'].dt.strftime('%Y-%m-%d').map(calendar_mapping).fillna(0).astype(int)
-
-# For audio, video, transcript, fill NaNs with 0 (or a special ID if you have one for 'no audio')
-fact_communication['audio_id'] = fact_communication['audio_url'].map(audio_mapping).fillna(0).astype(int)
-fact_communication['video_id'] = fact_communication['video_url'].map(video_mapping).fillna(0).astype(int)
-fact_communication['transcript_id'] = fact_communication['transcript_url'].map(transcript_mapping).fillna(0).astype(int)
+# The dimension codes line up row-for-row with raw_df and are -1 where a row has no value,
+# so codes + 1 is the surrogate key, with 0 for missing (or a special ID if you have one for 'no audio')
+fact_communication['comm_type_id'] = comm_type_codes + 1
+fact_communication['subject_id'] = subject_codes + 1
+fact_communication['calendar_id'] = calendar_codes + 1
+fact_communication['audio_id'] = audio_codes + 1
+fact_communication['video_id'] = video_codes + 1
+fact_communication['transcript_id'] = transcript_codes + 1
 
 
 # Handle datetime_id: Use start_time as the base. If you need a specific integer date key, generate it.
 # For simplicity, using Unix timestamp or just the formatted date string for datetime_id
-if 'start_time' in raw_df.columns:
-    fact_communication['datetime_id'] = raw_df['start_time'].astype(np.int64) // 10**9 # Unix timestamp
+if 'start_time' in raw_columns:
+    # View the datetime64 buffer as int64 without copying; the divisor follows the column's resolution
+    # (pandas may parse to ns, us or s), so the result is always seconds since the epoch.
+    # Timezone-aware times are converted to naive UTC first so to_numpy() gives datetime64, not objects.
+    start_time_col = raw_df['start_time']
+    if start_time_col.dt.tz is not None:
+        start_time_col = start_time_col.dt.tz_convert(None)
+    start_times = start_time_col.to_numpy()
+    ticks_per_second = np.timedelta64(1, 's') // np.timedelta64(1, np.datetime_data(start_times.dtype)[0])
+    has_start_time = ~np.isnat(start_times)
+    valid_datetime_ids = start_times[has_start_time].view('i8') // ticks_per_second # Unix timestamp
+    int32_info = np.iinfo(np.int32)
+    datetime_id_dtype = np.int64
+    if len(valid_datetime_ids) == 0 or (int32_info.min <= valid_datetime_ids.min() and valid_datetime_ids.max() <= int32_info.max):
+        datetime_id_dtype = np.int32 # Fits for 1901-2038, halves the column size
+    # Missing start times get 0, like the other foreign keys
+    datetime_ids = np.zeros(len(start_times), dtype=datetime_id_dtype)
+    datetime_ids[has_start_time] = valid_datetime_ids
+    fact_communication['datetime_id'] = datetime_ids
 else:
     fact_communication['datetime_id'] = 0 # Dummy value
 
 # Ensure 'is_processed' is an integer (boolean to int)
-if 'is_processed' in raw_df.columns:
+if 'is_processed' in raw_columns:
     fact_communication['is_processed'] = raw_df['is_processed'].astype(int)
 else:
     fact_communication['is_processed'] = 0 # Default to 0 if column not found
 
-# Drop the temporary columns used for mapping
-fact_communication.drop(columns=['event_type', 'audio_url', 'video_url', 'transcript_url', 'start_time'], inplace=True, errors='ignore')
-
 # Reorder columns to match field_dictionary (optional, but good practice)
 fact_comm_columns_order = [
     'comm_id', 'source_id', 'comm_type_id', 'subject_id', 'calendar_id',
@@ -363,18 +551,41 @@ fact_communication = fact_communication[[col for col in fact_comm_columns_order
 print("fact_communication:\n", fact_communication.head())
 
 
-# --- 5. Export Tables to Excel ---
-print(f"\nExporting dimension and fact tables to '{OUTPUT_EXCEL_FILE}'...")
+# --- 5. Export Tables to Excel, gzipped CSV and Parquet ---
+dimension_tables = {
+    'dim_comm_type': dim_comm_type,
+    'dim_subject': dim_subject,
+    'dim_user': dim_user,
+    'dim_calendar': dim_calendar,
+    'dim_audio': dim_audio,
+    'dim_video': dim_video,
+    'dim_transcript': dim_transcript
+}
+# The fact and bridge tables hold one row per communication / per user occurrence and dominate the output
+large_tables = {
+    'fact_communication': fact_communication,
+    'bridge_comm_user': bridge_comm_user
+}
+
+print(f"\nExporting dimension tables to '{OUTPUT_EXCEL_FILE}'...")
+# Note: xlsxwriter's constant_memory option can't be used here, pandas writes cells column by column
+# and constant_memory only keeps cells written in row order.
 with pd.ExcelWriter(OUTPUT_EXCEL_FILE, engine='xlsxwriter') as writer:
-    dim_comm_type.to_excel(writer, sheet_name='dim_comm_type', index=False)
-    dim_subject.to_excel(writer, sheet_name='dim_subject', index=False)
-    dim_user.to_excel(writer, sheet_name='dim_user', index=False)
-    dim_calendar.to_excel(writer, sheet_name='dim_calendar', index=False)
-    dim_audio.to_excel(writer, sheet_name='dim_audio', index=False)
-    dim_video.to_excel(writer, sheet_name='dim_video', index=False)
-    dim_transcript.to_excel(writer, sheet_name='dim_transcript', index=False)
-    fact_communication.to_excel(writer, sheet_name='fact_communication', index=False)
-    bridge_comm_user.to_excel(writer, sheet_name='bridge_comm_user', index=False)
-
-print("\nAll tables successfully exported to Excel!")
+    for table_name, table_df in dimension_tables.items():
+        table_df.to_excel(writer, sheet_name=table_name, index=False)
+
+print("\nAll dimension tables successfully exported to Excel!")
+
+# Excel's per-cell XML is the worst case for these tables; pandas' C CSV writer plus gzip is much faster and smaller
+print("\nExporting fact and bridge tables to gzipped CSV...")
+for table_name, table_df in large_tables.items():
+    table_df.to_csv(f'{table_name}{OUTPUT_CSV_SUFFIX}', index=False, compression='gzip')
+    print(f"  {table_name} -> '{table_name}{OUTPUT_CSV_SUFFIX}'")
+
+# Parquet is columnar and much smaller/faster to write than Excel XML, and can be read directly by analytical tools
+print(f"\nExporting dimension and fact tables to Parquet files in '{OUTPUT_PARQUET_DIR}'...")
+os.makedirs(OUTPUT_PARQUET_DIR, exist_ok=True)
+for table_name, table_df in {**dimension_tables, **large_tables}.items():
+    table_df.to_parquet(os.path.join(OUTPUT_PARQUET_DIR, f'{table_name}.parquet'), index=False, compression='zstd')
 
+print("\nAll tables successfully exported to Parquet!")